@@ -3,29 +3,40 @@
 import argparse
 import csv
 import re
-from dataclasses import dataclass
+import sys
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import UTC, datetime, timedelta
+from itertools import chain, pairwise
+from operator import attrgetter
 from pathlib import Path
 from xml.etree import ElementTree as ET
 
+import numpy as np
+import orjson
 import requests
-from fuzzywuzzy import (  # type: ignore[import-untyped] # This has been replaced by thefuzz, but I can't get it working as nice
-    fuzz,
-    process,
-)
+from rapidfuzz import fuzz, process, utils
+from requests.adapters import HTTPAdapter, Retry
 
 REQUESTS_TIMEOUT = 10
+M3U_CHUNK_SIZE = 64 * 1024
 API_URL = "https://api.acestream.me/all?api_version=1&api_key=test_api_key"
 LOGOS_PATH = Path("channel_logos.xml")
 
-FIND_COUNTRY_CODE_REGEX = re.compile(r"\s*\[\w{2}\]\s*$")
+FIND_COUNTRY_CODE_REGEX = re.compile(r"\s*\[(\w{2})\]\s*$")
 
-TVG_ID_COUNTRY_CODE_REGEX_1 = re.compile(r"\.(\w{2})\s*$")  # Matches .uk
-TVG_ID_COUNTRY_CODE_REGEX_2 = re.compile(r"^(\w{2})[ :]")  # Matches "UK " or "UK: "
+# Matches .uk at the end, otherwise "UK " or "UK: " at the start, the suffix goes first since it takes priority
+TVG_ID_COUNTRY_CODE_REGEX = re.compile(r"^(?:.*\.(?P<suffix>\w{2})\s*$|(?P<prefix>\w{2})[ :])")
 
 TVG_LOGO_REGEX = re.compile(r'tvg-logo="([^"]+)"')
 TVG_ID_REGEX = re.compile(r'tvg-id="([^"]+)"')
-LAST_FOUND_REGEX = re.compile(r'x-last-found="(\d+)"')  # Kinda wrong, but x-first-not-found is a bit too long
+# All the attributes we write to a playlist in one match, each is optional and they can be in any order
+EXTINF_ATTRIBUTES_REGEX = re.compile(
+    r'^(?=(?:.*?tvg-logo="(?P<tvg_logo>[^"]*)")?)'
+    r'(?=(?:.*?tvg-id="(?P<tvg_id>[^"]*)")?)'
+    r'(?=(?:.*?x-last-found="(?P<first_not_found>\d+)")?)'  # Kinda wrong, but x-first-not-found is a bit too long
+)
 
 ACE_URL_PREFIXES_CONTENT_ID = [
     "acestream://",
@@ -40,6 +51,10 @@ ACE_URL_PREFIXES_INFOHASH = [
     "http://127.0.0.1:6878/ace/manifest.m3u8?infohash=",
 ]
 
+# Each set of prefixes as one anchored alternation, so a URL is checked in a single match
+ACE_URL_CONTENT_ID_REGEX = re.compile(f"^(?:{'|'.join(map(re.escape, ACE_URL_PREFIXES_CONTENT_ID))})(.*)")
+ACE_URL_INFOHASH_REGEX = re.compile(f"^(?:{'|'.join(map(re.escape, ACE_URL_PREFIXES_INFOHASH))})(.*)")
+
 M3U_URI_SCHEMES = {
     "local_infohash": "http://127.0.0.1:6878/ace/manifest.m3u8?infohash=",
     "local_content_id": "http://127.0.0.1:6878/ace/manifest.m3u8?content_id=",
@@ -65,13 +80,21 @@ SPORT_WORDS = {
     "golf",
     "fórmula 1",
 }
+# No word boundaries, "sport" still has to match "Sports", "Eurosport" and "SuperSport", but not "Transport"
+SPORT_WORDS_REGEX = re.compile(f"(?<!tran)(?:{'|'.join(map(re.escape, sorted(SPORT_WORDS)))})", re.IGNORECASE)
+
+# One session for every request, so connections are kept alive and reused, and failed requests are retried
+REQUESTS_SESSION = requests.Session()
+REQUESTS_ADAPTER = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=Retry(total=3, backoff_factor=0.3))
+REQUESTS_SESSION.mount("https://", REQUESTS_ADAPTER)
+REQUESTS_SESSION.mount("http://", REQUESTS_ADAPTER)
 
 CURRENT_TIME = datetime.now(tz=UTC)
 STALE_CHANNEL_TIME_THRESHOLD = timedelta(days=3)
 
 
 # region Classes
-@dataclass
+@dataclass(slots=True)
 class Channel:
     """Object representing a channel."""
 
@@ -82,6 +105,11 @@ class Channel:
     infohash: str = ""
     content_id: str = ""
     category: str = ""
+    name_lower: str = field(init=False, repr=False, compare=False)  # Kept in sync with name, for sorting
+
+    def __post_init__(self) -> None:
+        """Cache the casefolded name."""
+        self.name_lower = self.name.casefold()
 
 
 # Region PreviousChannelProcessor
@@ -103,55 +131,48 @@ class PreviousChannelProcessor:
             print("Warning: Previous channels file does not exist:", file_path)
             return
 
-        with file_path.open("r", encoding="utf-8") as file:
-            line_one = ""
-            for line in file:
-                line_normalised = line.replace("#EXTINF:-1,", "#EXTINF:-1").strip()
-
-                # First line of an entry
-                if line.startswith("#EXTINF:"):
-                    line_one = line_normalised
-                    continue
-
-                # Second line of an entry
-                if not line.startswith("#EXTINF:") and line_one:
-                    content_id = extract_content_id_from_url(line)
-                    infohash = extract_infohash_from_url(line)
-                    category = "Sports" if is_sport_channel(line_one) else ""
-                    tvg_logo = TVG_LOGO_REGEX.search(line_one)
-                    tvg_id = TVG_ID_REGEX.search(line_one)
-
-                    first_not_found = LAST_FOUND_REGEX.search(line_one)
-
-                    self.previous_channels.append(
-                        Channel(
-                            name=line_one.split(",")[-1].strip(),
-                            tvg_logo=tvg_logo.group(1) if tvg_logo else "",
-                            tvg_id=tvg_id.group(1) if tvg_id else "",
-                            infohash=infohash,
-                            category=category,
-                            content_id=content_id,
-                            first_not_found=int(first_not_found.group(1)) if first_not_found else 0,
-                        )
+        line_one = ""
+        for line in file_path.read_text(encoding="utf-8").splitlines():
+            # First line of an entry
+            if line.startswith("#EXTINF:"):
+                line_one = line.replace("#EXTINF:-1,", "#EXTINF:-1").strip()
+                continue
+
+            # Second line of an entry
+            if line_one:
+                content_id = extract_content_id_from_url(line)
+                infohash = extract_infohash_from_url(line)
+                category = "Sports" if is_sport_channel(line_one) else ""
+
+                extinf_attributes = EXTINF_ATTRIBUTES_REGEX.match(line_one)
+                attributes = extinf_attributes.groupdict(default="") if extinf_attributes else {}
+                first_not_found = attributes.get("first_not_found")
+
+                self.previous_channels.append(
+                    Channel(
+                        name=line_one.rpartition(",")[2].strip(),
+                        tvg_logo=attributes.get("tvg_logo", ""),
+                        tvg_id=attributes.get("tvg_id", ""),
+                        infohash=infohash,
+                        category=category,
+                        content_id=content_id,
+                        first_not_found=int(first_not_found) if first_not_found else 0,
                     )
-                    line_one = ""
+                )
+                line_one = ""
 
     def get_recent_missing_channels(self, current_channels: list[Channel]) -> list[Channel]:
         """Get channels that were in the previous list but not in the current one."""
         skipped_old_channels = 0
         missing_channels: list[Channel] = []
 
+        current_content_ids = {channel.content_id for channel in current_channels if channel.content_id}
+        current_infohashes = {channel.infohash for channel in current_channels if channel.infohash}
+        current_timestamp = int(CURRENT_TIME.timestamp())
+
         for previous_channel in self.previous_channels:
-            found_content_id = any(
-                previous_channel.content_id == current_channel.content_id
-                for current_channel in current_channels
-                if current_channel.content_id
-            )
-            found_infohash = any(
-                previous_channel.infohash == current_channel.infohash
-                for current_channel in current_channels
-                if current_channel.infohash
-            )
+            found_content_id = previous_channel.content_id in current_content_ids
+            found_infohash = previous_channel.infohash in current_infohashes
             if not found_infohash and not found_content_id:
                 # If the channel is not found in the current list, add it to missing channels
                 msg = f"Channel '{previous_channel.name}' is missing in the current list."
@@ -163,7 +184,7 @@ class PreviousChannelProcessor:
                 else:
                     msg += " Adding it to the missing channels list, it's not too old."
                     if previous_channel.first_not_found == 0:
-                        previous_channel.first_not_found = int(CURRENT_TIME.timestamp())
+                        previous_channel.first_not_found = current_timestamp
                     missing_channels.append(previous_channel)
 
                 print(msg)
@@ -172,64 +193,127 @@ class PreviousChannelProcessor:
         return missing_channels
 
 
+# region LogoMatcher
+class LogoMatcher:
+    """Class to match channel names against the loaded logos."""
+
+    def __init__(self, logos: dict[str, str]) -> None:
+        """Initialize the matcher, processing the logo names once up front."""
+        self.logos = logos
+        self.logo_keys = list(logos.keys())
+        self.logo_keys_processed = [utils.default_process(logo_name) for logo_name in self.logo_keys]
+        # token_sort_ratio is just ratio on the sorted tokens, so sort the logo side once rather than per comparison
+        self.logo_keys_sorted = [sort_tokens(logo_name) for logo_name in self.logo_keys_processed]
+
+        # First logo wins if two names only differ by case, same as a linear scan would
+        self.logos_lower: dict[str, str] = {}
+        for logo_name, url in logos.items():
+            self.logos_lower.setdefault(logo_name.lower(), url)
+
+    def find_best_logo_matches(self, names: list[str]) -> list[str]:
+        """Find the best matching logo for each of the given channel names, scoring them all in one go."""
+        # Remove any country code from the names, indicated by a two-letter suffix between square brackets
+        names = [FIND_COUNTRY_CODE_REGEX.sub("", name.strip()) for name in names]
+        # Plenty of channels share a name once the country code is gone, only match each name once
+        unique_names = list(dict.fromkeys(names))
+        unique_urls = self._find_best_logo_matches_unique(unique_names)
+        url_by_name = dict(zip(unique_names, unique_urls, strict=True))
+        return [url_by_name[name] for name in names]
+
+    def _find_best_logo_matches_unique(self, names: list[str]) -> list[str]:
+        """Find the best matching logo for each of the given names, which have no duplicates or country codes."""
+        urls: list[str] = []
+        fuzzy_names: list[str] = []
+        fuzzy_rows: list[int] = []
+        for row, name in enumerate(names):
+            url = self.logos.get(name)
+            if url is None:
+                url = self.logos_lower.get(name.lower())
+
+            # Exact matches skip the fuzzy matching entirely
+            if url is None:
+                fuzzy_names.append(name)
+                fuzzy_rows.append(row)
+            urls.append(url or "")
+
+        if not fuzzy_names or not self.logo_keys:
+            return urls
+
+        # Use fuzzy matching to find the best match, scoring every name against every logo name at once
+        names_processed = [utils.default_process(name) for name in fuzzy_names]
+        scores = process.cdist(
+            [sort_tokens(name) for name in names_processed],
+            self.logo_keys_sorted,
+            scorer=fuzz.ratio,  # Same as token_sort_ratio, both sides are already sorted
+            processor=None,
+            score_cutoff=80,
+            dtype=np.uint8,
+            workers=-1,
+        )
+        best_indexes = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(fuzzy_names)), best_indexes]
+
+        # Anything below the cutoff is scored 0, only those rows need the partial_ratio fallback
+        fallback_rows = np.flatnonzero(best_scores == 0)
+        if fallback_rows.size:
+            fallback_scores = process.cdist(
+                [names_processed[row] for row in fallback_rows],
+                self.logo_keys_processed,
+                scorer=fuzz.partial_ratio,
+                processor=None,
+                score_cutoff=75,
+                dtype=np.uint8,
+                workers=-1,
+            )
+            best_indexes[fallback_rows] = fallback_scores.argmax(axis=1)
+            best_scores[fallback_rows] = fallback_scores[np.arange(fallback_rows.size), best_indexes[fallback_rows]]
+
+        for fuzzy_row, (row, name) in enumerate(zip(fuzzy_rows, fuzzy_names, strict=True)):
+            if best_scores[fuzzy_row]:
+                logo_name = self.logo_keys[best_indexes[fuzzy_row]]
+                print(f"Found fuzzy match for '{name}': {logo_name} with score {best_scores[fuzzy_row]}")
+                urls[row] = self.logos[logo_name]  # This is the URL
+
+        return urls
+
+    def assign_logos(self, channels: list[Channel]) -> None:
+        """Set the logo of each channel to the best match for its name."""
+        urls = self.find_best_logo_matches([channel.name for channel in channels])
+        for channel, url in zip(channels, urls, strict=True):
+            channel.tvg_logo = url
+
+
 # region get_logos
 def get_logos() -> dict[str, str]:
     """Load logos from the XML file to a dictionary channel_name,url."""
     print_heading("Loading Logos")
-    with LOGOS_PATH.open("r", encoding="utf-8") as file:
-        logos_xml = file.read()
-
-    if not logos_xml:
+    if not LOGOS_PATH.stat().st_size:
         return {}
 
-    root = ET.fromstring(logos_xml)
     logos = {}
 
-    # Parse the XML structure: regions contain channels with name attributes
-    for region in root.findall("region"):
-        for channel in region.findall("channel"):
-            channel_name = channel.get("name")
-            if channel_name:
-                for child in channel:
-                    if child.tag == "logo_url":
-                        logo_url = child.text.strip() if child.text else ""
-                        break
+    # Stream the XML structure: regions contain channels with name attributes, each cleared once read
+    for _, element in ET.iterparse(LOGOS_PATH, events=("end",)):
+        if element.tag != "channel":
+            continue
 
-                logos[channel_name] = logo_url
+        channel_name = element.get("name")
+        logo_url = element.findtext("logo_url", "").strip()
+        if channel_name and logo_url:
+            logos[channel_name] = logo_url
+        element.clear()
 
     print(f"Loaded {len(logos)} logos from {LOGOS_PATH}")
     return logos
 
 
 # region Names
-def find_best_logo_match(name: str, logos: dict[str, str]) -> str:
-    """Find the best matching logo for a given channel name."""
-    # Remove any country code from the name, indicated by a two-letter suffix between square brackets
-    name = FIND_COUNTRY_CODE_REGEX.sub("", name.strip())
-
-    for logo_name, url in logos.items():
-        if name.lower() == logo_name.lower():
-            return url
-
-    # Use fuzzy matching to find the best match
-    match = process.extractOne(name, logos.keys(), scorer=fuzz.token_sort_ratio, score_cutoff=80)
-
-    if not match:
-        match = process.extractOne(name, logos.keys(), scorer=fuzz.partial_ratio, score_cutoff=75)
-    if match:
-        print(f"Found fuzzy match for '{name}': {match[0]} with score {match[1]}")
-        return logos[match[0]]  # This is the URL
-    return ""
-
-
-def do_name_replace(name: str, replacements: dict[str, str]) -> str:
+def do_name_replace(name: str, replacements: dict[str, str], replacements_regex: re.Pattern[str]) -> str:
     """Replace names based on a CSV file."""
     name = name.strip()
 
-    new_name = name
-    for old, new in replacements.items():
-        if old in new_name:
-            new_name = new_name.replace(old, new)
+    # One pass over the name, replacements_regex is an alternation of all the keys in replacements
+    new_name = replacements_regex.sub(lambda match: replacements[match.group(0)], name)
 
     if new_name != name:
         print(f"Replaced '{name}' with '{new_name}'")
@@ -272,43 +356,27 @@ def get_name_replacements(replacements_csv: Path) -> dict[str, str]:
 # region TVG Handling
 def get_country_code_from_tvg_id(tvg_id: str) -> str:
     """Extract country code from the tvg_id."""
-    matches = TVG_ID_COUNTRY_CODE_REGEX_1.findall(tvg_id)
-    if matches:
-        return f"[{matches[0].upper()}]"
-
-    matches = TVG_ID_COUNTRY_CODE_REGEX_2.findall(tvg_id)
-    if matches:
-        return f"[{matches[0].upper()}]"
+    match = TVG_ID_COUNTRY_CODE_REGEX.match(tvg_id)
+    if match:
+        return f"[{(match['suffix'] or match['prefix']).upper()}]"
 
     return "[?]"
 
 
 def get_tvg_id_from_title(title: str) -> str:
     """Extract the TVG ID from the title."""
-    country_code_regex = FIND_COUNTRY_CODE_REGEX.search(title)
-    if not country_code_regex:
+    country_code = FIND_COUNTRY_CODE_REGEX.search(title)
+    if not country_code:
         return ""
 
-    try:
-        country_code_regex.group(0)
-    except IndexError:
-        print(f"Very strange title: {title}")
-        return ""
-
-    if isinstance(country_code_regex.group(0), str):
-        country_code = country_code_regex.group(0).replace("[", "").replace("]", "").strip()
-        title_no_cc = title.replace(f"[{country_code}]", "").strip()
-
-        return f"{title_no_cc}.{country_code.lower()}"
-    return ""
+    title_no_cc = title[: country_code.start()].strip()
+    return f"{title_no_cc}.{country_code.group(1).lower()}"
 
 
 def is_sport_channel(channel_name: str) -> bool:
     """Check if a channel is a sport channel based on its name."""
-    # Normalize the channel name to lowercase for case-insensitive comparison
-    normalized_name = channel_name.lower()
-    # Check if any of the sport words are in the channel name
-    return any(sport_word.lower() in normalized_name for sport_word in SPORT_WORDS)
+    # Check if any of the sport words are in the channel name, ignoring case
+    return SPORT_WORDS_REGEX.search(channel_name) is not None
 
 
 # region Playlist
@@ -318,94 +386,107 @@ def create_playlists(playlist_name: str, list_of_channels: list[Channel]) -> Non
     output_directory = Path("playlists")
     output_directory.mkdir(exist_ok=True)
 
-    for uri_scheme, prefix in M3U_URI_SCHEMES.items():
-        playlist_path = output_directory / f"{playlist_name}_{uri_scheme}.m3u"
-        with playlist_path.open("w", encoding="utf-8") as m3u_file:
-            m3u_file.write("#EXTM3U\n")
-            for channel in list_of_channels:
-                top_line = f'#EXTINF:-1 tvg-logo="{channel.tvg_logo}" tvg-id="{channel.tvg_id}" group-title="{channel.category}" x-last-found="{channel.first_not_found}", {channel.name}\n'  # noqa: E501 This line can be long
-                if channel.infohash != "" and uri_scheme == "local_infohash":
-                    m3u_file.write(top_line)
-                    m3u_file.write(f"{prefix}{channel.infohash}\n")
-                elif channel.content_id != "" and uri_scheme != "local_infohash":
-                    m3u_file.write(top_line)
-                    m3u_file.write(f"{prefix}{channel.content_id}\n")
+    # Build every playlist in the same pass over the channels, then write each one in one go
+    playlists = {uri_scheme: ["#EXTM3U\n"] for uri_scheme in M3U_URI_SCHEMES}
+    content_id_schemes = [
+        (playlists[uri_scheme], prefix)
+        for uri_scheme, prefix in M3U_URI_SCHEMES.items()
+        if uri_scheme != "local_infohash"
+    ]
+    infohash_lines = playlists["local_infohash"]
+    infohash_prefix = M3U_URI_SCHEMES["local_infohash"]
+
+    for channel in list_of_channels:
+        if channel.infohash == "" and channel.content_id == "":
+            continue
+
+        top_line = f'#EXTINF:-1 tvg-logo="{channel.tvg_logo}" tvg-id="{channel.tvg_id}" group-title="{channel.category}" x-last-found="{channel.first_not_found}", {channel.name}\n'  # noqa: E501 This line can be long
+        if channel.infohash != "":
+            infohash_lines.extend((top_line, f"{infohash_prefix}{channel.infohash}\n"))
+        if channel.content_id != "":
+            for lines, prefix in content_id_schemes:
+                lines.extend((top_line, f"{prefix}{channel.content_id}\n"))
 
+    for uri_scheme, lines in playlists.items():
+        playlist_path = output_directory / f"{playlist_name}_{uri_scheme}.m3u"
+        playlist_path.write_text("".join(lines), encoding="utf-8")
         print(f"Created playlist {playlist_path} with {len(list_of_channels)} channels.")
 
 
 # region URL Handling
 def extract_infohash_from_url(url: str) -> str:
     """Extract infohash from a URL."""
-    for prefix in ACE_URL_PREFIXES_INFOHASH:
-        if url.startswith(prefix):
-            return url[len(prefix) :].strip()
-    return ""
+    match = ACE_URL_INFOHASH_REGEX.match(url)
+    return match.group(1).strip() if match else ""
 
 
 def extract_content_id_from_url(url: str) -> str:
     """Extract content ID from a URL."""
-    for prefix in ACE_URL_PREFIXES_CONTENT_ID:
-        if url.startswith(prefix):
-            return url[len(prefix) :].strip()
-    return ""
+    match = ACE_URL_CONTENT_ID_REGEX.match(url)
+    return match.group(1).strip() if match else ""
 
 
 # region Download/API
 def populate_list_from_m3u(url: str) -> list[Channel]:
     """Populate a list of channels from an M3U file."""
-    csv_columns = 2
     print_heading(f"Scraping M3U from {url}")
-    response = requests.get(url, timeout=REQUESTS_TIMEOUT)
-    response.raise_for_status()
-    m3u_content = response.text
-
-    channels = []
-    lines = m3u_content.splitlines()
-    for i in range(len(lines)):
-        if lines[i].startswith("#EXTINF:"):
-            # Extract channel name and logo
-            extinf_parts = lines[i][len("#EXTINF:") :].split(",")
-            if len(extinf_parts) < csv_columns:
-                continue  # Skip malformed lines
-            channel_info = extinf_parts[0].strip()
-            channel_name = extinf_parts[1].strip()
-
-            # Extract logo URL if available
-            logo_match = TVG_LOGO_REGEX.search(channel_info)
-            logo_url = logo_match.group(1) if logo_match else ""
-
-            # Extract tvg_id if available
-            tvg_id_match = TVG_ID_REGEX.search(channel_info)
-            tvg_id = tvg_id_match.group(1) if tvg_id_match else ""
-
-            # Extract infohash from the next line
-            if i + 1 < len(lines):
-                url_line = lines[i + 1].strip()
-                infohash = extract_infohash_from_url(url_line)
-                content_id = extract_content_id_from_url(url_line)
-
-                channels.append(
-                    Channel(
-                        name=channel_name,
-                        tvg_logo=logo_url,
-                        tvg_id=tvg_id,
-                        infohash=infohash,
-                        content_id=content_id,
-                        first_not_found=0,
-                    )
-                )
+    with REQUESTS_SESSION.get(url, timeout=REQUESTS_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+        if response.encoding is None:
+            response.encoding = "utf-8"  # Otherwise iter_lines hands back bytes
+
+        # Parse the lines as they arrive. Blank lines are dropped, iter_lines can make one out of a \r\n split
+        # across two chunks which would get paired with an EXTINF instead of the URL
+        lines = filter(None, response.iter_lines(chunk_size=M3U_CHUNK_SIZE, decode_unicode=True))
+        channels = list(parse_m3u_lines(lines))
 
     print(f"Found {len(channels)} channels in M3U file.")
     return channels
 
 
+def parse_m3u_lines(lines: Iterable[str]) -> Iterator[Channel]:
+    """Parse channels from the lines of an M3U file."""
+    # Each line paired with the one after it, an EXTINF on the very last line has no URL so it's never paired
+    for line, next_line in pairwise(lines):
+        if not line.startswith("#EXTINF:"):
+            continue
+
+        # Extract channel name and logo
+        channel_info, separator, channel_name = line[len("#EXTINF:") :].partition(",")
+        if not separator:
+            continue  # Skip malformed lines
+        channel_info = channel_info.strip()
+        channel_name = channel_name.partition(",")[0].strip()  # Anything after a second comma is dropped
+
+        # Extract logo URL if available
+        logo_match = TVG_LOGO_REGEX.search(channel_info)
+        logo_url = logo_match.group(1) if logo_match else ""
+
+        # Extract tvg_id if available
+        tvg_id_match = TVG_ID_REGEX.search(channel_info)
+        tvg_id = tvg_id_match.group(1) if tvg_id_match else ""
+
+        # Extract infohash from the next line
+        url_line = next_line.strip()
+        infohash = extract_infohash_from_url(url_line)
+        content_id = extract_content_id_from_url(url_line)
+
+        yield Channel(
+            name=channel_name,
+            tvg_logo=logo_url,
+            tvg_id=tvg_id,
+            infohash=infohash,
+            content_id=content_id,
+            first_not_found=0,
+        )
+
+
 def populate_list_from_api(api_url: str) -> list[Channel]:
     """Populate a list of channels from the AceStream API."""
     print_heading(f"Scraping API from {api_url}")
-    response = requests.get(API_URL, timeout=REQUESTS_TIMEOUT)
+    response = REQUESTS_SESSION.get(api_url, timeout=REQUESTS_TIMEOUT)
     response.raise_for_status()
-    data = response.json()
+    data = orjson.loads(response.content)
     if not isinstance(data, list):
         msg = "Unexpected data format received from API, got a list"
         print(msg)
@@ -417,7 +498,8 @@ def populate_list_from_api(api_url: str) -> list[Channel]:
         name = item.get("name", "Unknown")
 
         categories = item.get("categories", [])
-        category = "" if not categories else categories[0]
+        # Only a handful of categories are shared by every channel, keep one copy of each
+        category = "" if not categories else sys.intern(str(categories[0]))
 
         channel_list.append(
             Channel(
@@ -433,6 +515,21 @@ def populate_list_from_api(api_url: str) -> list[Channel]:
     return channel_list
 
 
+def populate_list(m3u_url: str, api_url: str) -> Iterator[Channel]:
+    """Populate channels from the M3U file and the AceStream API, fetching both at the same time."""
+    # Both sources are only waiting on HTTP, so there's no reason to fetch one after the other
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        populate_futures: list[Future[list[Channel]]] = []
+        if m3u_url:
+            populate_futures.append(executor.submit(populate_list_from_m3u, m3u_url))
+
+        if api_url:
+            populate_futures.append(executor.submit(populate_list_from_api, api_url))
+
+    # Chain the results in submission order rather than copying them into one list, M3U channels still come first
+    return chain.from_iterable(populate_future.result() for populate_future in populate_futures)
+
+
 # region Helpers
 
 
@@ -441,27 +538,37 @@ def print_heading(heading: str) -> None:
     print(f"\n{'=' * 10} {heading} {'=' * 10}")
 
 
-def deduplicate_channels(channel_list: list[Channel]) -> list[Channel]:
-    """Remove duplicate channels based on infohash or content_id."""
-    seen_infohashes = set()
-    seen_content_ids = set()
+def sort_tokens(text: str) -> str:
+    """Sort the whitespace separated tokens of a string, the same way token_sort_ratio does."""
+    return " ".join(sorted(text.split()))
 
-    found_channels: list[Channel] = []
 
-    for channel in channel_list:
-        if channel.infohash and channel.infohash in seen_infohashes:
-            continue
-        if channel.content_id and channel.content_id in seen_content_ids:
-            continue
+def compile_substrings_regex(substrings: Iterable[str]) -> re.Pattern[str]:
+    """Compile substrings to a single regex alternation, longest first so overlapping ones pick the longest."""
+    return re.compile("|".join(map(re.escape, sorted(substrings, key=len, reverse=True))))
+
+
+def deduplicate_channels(channels: Iterable[Channel]) -> Iterator[Channel]:
+    """Yield channels, skipping duplicates based on infohash or content_id."""
+    seen_infohashes: set[str] = set()
+    seen_content_ids: set[str] = set()
 
-        if channel.infohash:
-            seen_infohashes.add(channel.infohash)
-        if channel.content_id:
-            seen_content_ids.add(channel.content_id)
+    # Bind the set methods once, they're called for every channel
+    seen_infohash = seen_infohashes.__contains__
+    seen_content_id = seen_content_ids.__contains__
+    add_infohash = seen_infohashes.add
+    add_content_id = seen_content_ids.add
 
-        found_channels.append(channel)
+    for channel in channels:
+        infohash = channel.infohash
+        content_id = channel.content_id
+        if (infohash and seen_infohash(infohash)) or (content_id and seen_content_id(content_id)):
+            continue
 
-    return found_channels
+        # Adding an empty ID is harmless, it's never checked against
+        add_infohash(infohash)
+        add_content_id(content_id)
+        yield channel
 
 
 # region Main
@@ -504,25 +611,22 @@ def main() -> None:
     print(f"Playlist name: {args.playlist_name}")
 
     # Logos
-    logos = get_logos()
+    logo_matcher = LogoMatcher(get_logos())
 
     # Filter list
     filter_list = []
     if args.filter_file:
         filter_list = get_filter_list(Path(args.filter_file))
+    filter_regex = compile_substrings_regex(filter_list)
 
     # Populate
-    channel_list_scratch: list[Channel] = []
-    if args.m3u_url:
-        channel_list_scratch.extend(populate_list_from_m3u(args.m3u_url))
-
-    if args.api_url:
-        channel_list_scratch.extend(populate_list_from_api(args.api_url))
+    channel_list_scratch = populate_list(args.m3u_url, args.api_url)
 
     channel_list: list[Channel] = []
 
     # Name replacements
     name_replacements = get_name_replacements(Path(args.name_replacements))
+    name_replacements_regex = compile_substrings_regex(name_replacements)
 
     print_heading("Processing Channels")
     for channel in channel_list_scratch:
@@ -532,13 +636,13 @@ def main() -> None:
             channel.name = f"{channel.name} {get_country_code_from_tvg_id(channel.tvg_id)}"
 
         if name_replacements:
-            channel.name = do_name_replace(channel.name, name_replacements)
+            channel.name = do_name_replace(channel.name, name_replacements, name_replacements_regex)
 
         # Continue only if we passed the filter
-        if filter_list and not any(filter_str in channel.name for filter_str in filter_list):
+        if filter_list and not filter_regex.search(channel.name):
             continue
 
-        channel.tvg_logo = find_best_logo_match(channel.name, logos)
+        channel.name_lower = channel.name.casefold()
 
         if not channel.tvg_id:
             channel.tvg_id = get_tvg_id_from_title(channel.name)
@@ -548,14 +652,18 @@ def main() -> None:
 
         channel_list.append(channel)
 
+    logo_matcher.assign_logos(channel_list)
+
     # Grab old channels that were not found in the current scrape
     print_heading("Checking for Old Channels")
     old_channels = PreviousChannelProcessor(args.playlist_name).get_recent_missing_channels(channel_list)
-    channel_list.extend(old_channels)
 
     print_heading("Post-Processing Channels")
-    channel_list = deduplicate_channels(channel_list)
-    channel_list.sort(key=lambda x: x.name.lower())
+    # Deduplicate straight into the sort, without building an intermediate list
+    channel_list = sorted(
+        deduplicate_channels(chain(channel_list, old_channels)),
+        key=attrgetter("name_lower"),
+    )
     print("Deduplicated, sorted channels by name.")
 
     # Create the M3U playlist